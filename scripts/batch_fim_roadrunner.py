@@ -0,0 +1,395 @@
+"""
+Run the libRoadRunner FIM check (`check_mm_fim_roadrunner.py`) over many SBML
+models in one invocation, spreading the work across a process pool.
+
+Key capabilities:
+- Accepts a directory of SBML exports or a manifest file listing model paths
+- Schedules models longest-predicted-first so a large model does not start last
+  and leave the pool idle behind a single straggler
+- Predicts cost from past timings in a previous report, falling back to
+  species/reaction counts read directly from the SBML
+- Isolates per-model failures: a model that raises is recorded as an error; a
+  native crash that breaks the pool is pinned on the model(s) that were running
+  (re-running each alone when several were), and models that had not started
+  are resubmitted to a fresh pool in planned order; if the pool breaks before
+  any model starts, the remaining models are recorded as errors instead
+- Streams one JSON record per model to `<report>.partial` as each model
+  finishes, then moves it over the report once the batch completes, so an
+  interrupted run leaves the previous report (and its timings) intact
+
+Usage examples::
+
+    # Every *.xml / *.sbml file in a directory, one worker per CPU
+    python scripts/batch_fim_roadrunner.py exports/ --report fim_report.jsonl
+
+    # Manifest (one path per line, '#' comments, relative to the manifest)
+    python scripts/batch_fim_roadrunner.py models.txt --workers 4 --steps 1000
+
+Re-running with the same --report reuses its timings to order the next batch,
+rescaled to the current number of time points and parameters; pass --history
+to read timings from a different report.
+
+Requirements:
+    pip install libroadrunner numpy
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+import traceback
+import xml.etree.ElementTree as ET
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Sequence, Set, Tuple
+
+from check_mm_fim_roadrunner import FIMResult, SimulationConfig, run_fim
+
+
+SBML_SUFFIXES = ('.xml', '.sbml')
+
+
+@dataclass(frozen=True)
+class ModelJob:
+    path: Path
+    species: int
+    reactions: int
+    predicted_cost: float
+
+
+def discover_models(source: Path) -> List[Path]:
+    """Resolve a directory of SBML files or a manifest file into model paths."""
+    if source.is_dir():
+        return sorted(p.resolve() for p in source.iterdir() if p.suffix.lower() in SBML_SUFFIXES)
+
+    models: List[Path] = []
+    for raw in source.read_text(encoding='utf-8').splitlines():
+        line = raw.split('#', 1)[0].strip()
+        if not line:
+            continue
+        path = Path(line)
+        if not path.is_absolute():
+            path = source.parent / path
+        models.append(path.resolve())
+    # Drop repeated entries (keeping the first) so each model runs, and is tracked, once.
+    return list(dict.fromkeys(models))
+
+
+def count_species_and_reactions(sbml_path: Path) -> Tuple[int, int]:
+    """Count SBML species and reactions without loading the model into RoadRunner."""
+    try:
+        root = ET.parse(sbml_path).getroot()
+    except (ET.ParseError, OSError):
+        return 0, 0
+    if not root.tag.startswith('{'):
+        return 0, 0
+    ns = {'sbml': root.tag.split('}', 1)[0][1:]}
+    species = len(root.findall('.//sbml:listOfSpecies/sbml:species', ns))
+    reactions = len(root.findall('.//sbml:listOfReactions/sbml:reaction', ns))
+    return species, reactions
+
+
+def load_past_timings(
+    report_path: Path | None,
+    config: SimulationConfig,
+    parameter_count: int | None = None,
+) -> Dict[str, float]:
+    """Read timings of successful runs from a previous report, rescaled to this run.
+
+    A FIM run costs 2 simulations per parameter over `points` output points, so
+    each timing is scaled by the ratio of points and, when this run's parameter
+    list is fixed via --parameters, of parameter counts. Records that lack the
+    run configuration cannot be rescaled and are ignored.
+    """
+    timings: Dict[str, float] = {}
+    if report_path is None or not report_path.exists():
+        return timings
+    for line in report_path.read_text(encoding='utf-8').splitlines():
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if record.get('status') != 'ok' or 'elapsed_seconds' not in record:
+            continue
+        past_points = record.get('points')
+        past_params = record.get('parameter_count')
+        if not past_points or not past_params:
+            continue
+        scale = config.points / past_points
+        if parameter_count:
+            scale *= parameter_count / past_params
+        timings[record['model']] = float(record['elapsed_seconds']) * scale
+    return timings
+
+
+def plan_jobs(models: Sequence[Path], timings: Dict[str, float], config: SimulationConfig) -> List[ModelJob]:
+    """Predict per-model cost and order the jobs longest-predicted-first.
+
+    Past timings are used when available. Models without a timing fall back to
+    (species + reactions) * time points, rescaled into seconds by the median
+    seconds-per-unit ratio of the models that do have one, so both kinds of
+    estimate can be ranked together.
+    """
+    sizes = {path: count_species_and_reactions(path) for path in models}
+    heuristic = {path: float(max(1, sum(sizes[path])) * config.points) for path in models}
+
+    ratios = [timings[str(path)] / heuristic[path] for path in models if str(path) in timings]
+    seconds_per_unit = statistics.median(ratios) if ratios else 1.0
+
+    jobs = [
+        ModelJob(
+            path=path,
+            species=sizes[path][0],
+            reactions=sizes[path][1],
+            predicted_cost=timings.get(str(path), heuristic[path] * seconds_per_unit),
+        )
+        for path in models
+    ]
+    jobs.sort(key=lambda job: job.predicted_cost, reverse=True)
+    return jobs
+
+
+def summarise_result(result: FIMResult) -> Dict[str, Any]:
+    fim_stats = result.fim
+    ident_stats = result.identifiability
+    return {
+        'parameters': result.param_names,
+        'observables': result.observables,
+        'eigenvalues': [float(val) for val in fim_stats.eigenvalues],
+        'condition_number': fim_stats.condition_number,
+        'regularized_condition': fim_stats.regularized_condition,
+        'identifiable_params': ident_stats.identifiable_params,
+        'unidentifiable_params': ident_stats.unidentifiable_params,
+        'nullspace_combinations': [
+            {'eigenvalue': combo.eigenvalue, 'components': [[name, loading] for name, loading in combo.components]}
+            for combo in ident_stats.nullspace_combinations
+        ],
+        'top_correlated_pairs': [
+            {'names': list(pair.names), 'corr': pair.corr} for pair in result.correlated_pairs
+        ],
+    }
+
+
+def run_job(
+    sbml_path: Path,
+    config: SimulationConfig,
+    parameters: Sequence[str] | None,
+    rel_eps: float,
+    started_marker: Path | None = None,
+) -> Dict[str, Any]:
+    """Worker entry point: run one model and never raise, so failures stay per-model.
+
+    The marker file is created before any RoadRunner work so the parent can tell
+    which models were in flight if a native crash takes the pool down.
+    """
+    if started_marker is not None:
+        started_marker.touch()
+    start = time.perf_counter()
+    try:
+        result = run_fim(sbml_path, config, parameters, rel_eps)
+    except Exception as exc:  # noqa: BLE001 - any model failure must not abort the batch
+        return {
+            'status': 'error',
+            'elapsed_seconds': time.perf_counter() - start,
+            'error': f'{type(exc).__name__}: {exc}',
+            'traceback': traceback.format_exc(),
+        }
+    return {
+        'status': 'ok',
+        'elapsed_seconds': time.perf_counter() - start,
+        **summarise_result(result),
+    }
+
+
+def run_pool(
+    jobs: Sequence[ModelJob],
+    workers: int,
+    submit: Callable[[ProcessPoolExecutor, ModelJob], Future[Dict[str, Any]]],
+    started: Callable[[ModelJob], bool],
+    on_outcome: Callable[[ModelJob, Dict[str, Any]], None],
+) -> Tuple[List[ModelJob], List[ModelJob]]:
+    """Run jobs on one pool until it drains or breaks.
+
+    Returns the jobs that were running and the jobs that had not started when
+    the pool broke (both empty if it did not).
+    """
+    with ProcessPoolExecutor(max_workers=max(1, min(workers, len(jobs)))) as pool:
+        # The executor dequeues in submission order, so submitting in planned order
+        # is what makes the schedule longest-predicted-first.
+        futures: Dict[Future[Dict[str, Any]], ModelJob] = {submit(pool, job): job for job in jobs}
+        reported: Set[Future[Dict[str, Any]]] = set()
+        broken = False
+        for future in as_completed(futures):
+            if isinstance(future.exception(), BrokenProcessPool):
+                broken = True
+                break
+            reported.add(future)
+            on_outcome(futures[future], outcome_of(future))
+
+    if not broken:
+        return [], []
+
+    running: List[ModelJob] = []
+    not_started: List[ModelJob] = []
+    for future, job in futures.items():
+        if future in reported:
+            continue
+        if not isinstance(future.exception(), BrokenProcessPool):
+            on_outcome(job, outcome_of(future))  # finished just before the pool broke
+        elif started(job):
+            running.append(job)
+        else:
+            not_started.append(job)
+    return running, not_started
+
+
+def outcome_of(future: Future[Dict[str, Any]]) -> Dict[str, Any]:
+    exc = future.exception()
+    if exc is not None:
+        return {'status': 'error', 'error': f'{type(exc).__name__}: {exc}'}
+    return future.result()
+
+
+def run_batch(
+    jobs: Sequence[ModelJob],
+    workers: int,
+    config: SimulationConfig,
+    parameters: Sequence[str] | None,
+    rel_eps: float,
+    on_outcome: Callable[[ModelJob, Dict[str, Any]], None],
+) -> None:
+    """Run every job, recovering from pools broken by native crashes.
+
+    A pool that breaks before any model has started (e.g. a worker failing to
+    bootstrap) would break again if rebuilt, so its jobs are recorded as errors
+    rather than resubmitted; every round therefore settles at least one job.
+    """
+    crash_outcome = {'status': 'error', 'error': 'Worker process crashed while running this model.'}
+    unstarted_outcome = {'status': 'error', 'error': 'Process pool broke before this model started.'}
+    marker_index = {job: index for index, job in enumerate(jobs)}
+
+    with tempfile.TemporaryDirectory(prefix='fim_batch_') as tmp:
+        marker_dir = Path(tmp)
+
+        def marker(job: ModelJob) -> Path:
+            return marker_dir / f'{marker_index[job]}.started'
+
+        def submit(pool: ProcessPoolExecutor, job: ModelJob) -> Future[Dict[str, Any]]:
+            marker(job).unlink(missing_ok=True)
+            return pool.submit(run_job, job.path, config, parameters, rel_eps, marker(job))
+
+        def started(job: ModelJob) -> bool:
+            return marker(job).exists()
+
+        pending = list(jobs)
+        while pending:
+            running, pending = run_pool(pending, workers, submit, started, on_outcome)
+            if not running:
+                for job in pending:
+                    on_outcome(job, unstarted_outcome)
+                return
+            if len(running) == 1:
+                on_outcome(running[0], crash_outcome)
+                continue
+            # Several models were in flight; re-run each alone to find the culprit.
+            for job in running:
+                crashed, unstarted = run_pool([job], 1, submit, started, on_outcome)
+                if crashed:
+                    on_outcome(job, crash_outcome)
+                elif unstarted:
+                    on_outcome(job, unstarted_outcome)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Run the RoadRunner FIM check over many SBML models.')
+    parser.add_argument('source', type=Path, help='Directory of SBML models or a manifest file listing model paths.')
+    parser.add_argument('--report', type=Path, default=Path('fim_batch_report.jsonl'), help='Consolidated JSON Lines report (default: fim_batch_report.jsonl).')
+    parser.add_argument('--history', type=Path, help='Previous report used for timing-based scheduling (default: the existing --report).')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Number of worker processes (default: CPU count).')
+    parser.add_argument('--parameters', nargs='+', help='Parameter IDs to differentiate in every model (default: k_* params per model).')
+    parser.add_argument('--steps', type=int, default=500, help='Number of uniform integration steps (default: 500).')
+    parser.add_argument('--t-end', type=float, default=50.0, help='Simulation end time (default: 50).')
+    parser.add_argument('--rel-eps', type=float, default=1e-4, help='Relative perturbation size for finite differences (default: 1e-4).')
+    parser.add_argument('--abs-tol', type=float, default=1e-12, help='CVODE absolute tolerance (default: 1e-12).')
+    parser.add_argument('--rel-tol', type=float, default=1e-10, help='CVODE relative tolerance (default: 1e-10).')
+    parser.add_argument('--integrator', type=str, default='cvode', help="RoadRunner integrator to use (e.g. 'cvode', 'rk4').")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    source: Path = args.source
+    if not source.exists():
+        raise FileNotFoundError(f'Model source not found: {source}')
+
+    config = SimulationConfig(
+        end=args.t_end,
+        steps=args.steps,
+        rel_tol=args.rel_tol,
+        abs_tol=args.abs_tol,
+        integrator=args.integrator,
+    )
+
+    models = discover_models(source)
+    if not models:
+        raise RuntimeError(f'No SBML models found in {source}')
+
+    # By default a nightly run schedules from its own previous report.
+    timings = load_past_timings(
+        args.history or args.report, config, len(args.parameters) if args.parameters else None
+    )
+    jobs = plan_jobs(models, timings, config)
+    workers = max(1, min(args.workers, len(jobs)))
+
+    print(f'Scheduling {len(jobs)} models across {workers} workers (longest predicted first).\n')
+
+    failures = 0
+    done = 0
+
+    # Write beside the report and only replace it at the end, so an interrupted run
+    # keeps the previous report as scheduling history.
+    partial_path = args.report.with_name(args.report.name + '.partial')
+    with partial_path.open('w', encoding='utf-8') as report:
+
+        def record_outcome(job: ModelJob, outcome: Dict[str, Any]) -> None:
+            nonlocal done, failures
+            done += 1
+            record = {
+                'model': str(job.path),
+                'species': job.species,
+                'reactions': job.reactions,
+                'predicted_cost': job.predicted_cost,
+                'steps': config.steps,
+                'points': config.points,
+                't_end': config.end,
+                'parameter_count': len(outcome.get('parameters') or args.parameters or []) or None,
+                **outcome,
+            }
+            report.write(json.dumps(record) + '\n')
+            report.flush()
+
+            if outcome['status'] != 'ok':
+                failures += 1
+            elapsed = outcome.get('elapsed_seconds')
+            timing = f' in {elapsed:.2f}s' if elapsed is not None else ''
+            print(f'[{done}/{len(jobs)}] {outcome["status"]:>5} {job.path.name}{timing}')
+            if outcome['status'] != 'ok':
+                print(f'        {outcome["error"]}')
+
+        run_batch(jobs, workers, config, args.parameters, args.rel_eps, record_outcome)
+
+    os.replace(partial_path, args.report)
+
+    print()
+    print(f'Finished {len(jobs)} models: {len(jobs) - failures} ok, {failures} failed.')
+    print(f'Report written to: {args.report}')
+
+
+if __name__ == '__main__':
+    main()
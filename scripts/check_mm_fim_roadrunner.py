@@ -10,6 +10,9 @@ Key capabilities:
 - Uses central finite differences over the full time course to assemble J and F
 - Provides CLI options for custom parameter subsets, time horizons, and step
   counts
+- Combines several experimental conditions (initial values, parameter
+  overrides, time grids, per-observable noise weights) into one FIM, with the
+  perturbation stencils of all conditions simulated concurrently
 
 Usage examples::
 
@@ -20,15 +23,37 @@ Usage examples::
     python scripts/check_mm_fim_roadrunner.py model.xml --parameters k_on k_cat \
         --steps 1000
 
+    # Sum the FIMs of several experiments, simulating stencils on 4 processes
+    python scripts/check_mm_fim_roadrunner.py model.xml --conditions doses.json \
+        --workers 4
+
+Conditions file format (JSON, a list or {"conditions": [...]}; every key is
+optional, "name" defaults to condition_N and the time grid "t_start"/"t_end"/
+"steps" falls back to 0/--t-end/--steps)::
+
+    {"conditions": [
+        {"name": "low_dose", "initial": {"S(e)": 10.0}, "parameters": {"E_0": 0.5},
+         "t_start": 0.0, "t_end": 100.0, "steps": 1000, "weights": {"obs_P": 4.0}},
+        {"name": "high_dose", "initial": {"S(e)": 100.0}}
+    ]}
+
+"initial" keys are BNGL species names or SBML species IDs. "weights" are
+per-observable inverse noise variances (1 / sigma^2, default 1).
+
 Requirements:
     pip install libroadrunner numpy
+
+To run the check over many models at once, see `batch_fim_roadrunner.py`.
 """
 
 from __future__ import annotations
 
 import argparse
+import dataclasses
+import json
 import xml.etree.ElementTree as ET
-from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any, Dict, List, Sequence, Tuple, cast
 
@@ -38,6 +63,8 @@ import roadrunner
 
 SPECIES_ID_BY_NAME: Dict[str, str] = {}
 TIMECOURSE_SELECTIONS: List[str] = []
+INITIAL_VALUES: Dict[str, float] = {}
+STENCIL_WORKER_STATE: Dict[str, Any] = {}
 
 
 @dataclass(frozen=True)
@@ -54,6 +81,15 @@ class SimulationConfig:
         return self.steps + 1
 
 
+@dataclass(frozen=True)
+class ExperimentalCondition:
+    name: str
+    config: SimulationConfig
+    initial_values: Dict[str, float] = field(default_factory=dict)
+    parameters: Dict[str, float] = field(default_factory=dict)
+    weights: Dict[str, float] = field(default_factory=dict)
+
+
 @dataclass(frozen=True)
 class FIMDecomposition:
     fim_matrix: np.ndarray
@@ -84,6 +120,16 @@ class CorrelationPair:
     corr: float
 
 
+@dataclass(frozen=True)
+class FIMResult:
+    param_names: List[str]
+    observables: List[str]
+    fim: FIMDecomposition
+    identifiability: IdentifiabilitySummary
+    correlated_pairs: List[CorrelationPair]
+    condition_fims: Dict[str, np.ndarray] = field(default_factory=dict)
+
+
 def configure_integrator(rr: roadrunner.RoadRunner, config: SimulationConfig) -> None:
     """Configure the requested integrator and harmonise settings across modes."""
     desired = config.integrator.lower()
@@ -173,16 +219,53 @@ def load_species_name_map(sbml_path: Path) -> Dict[str, str]:
     return mapping
 
 
+def snapshot_initial_values(rr: roadrunner.RoadRunner) -> Dict[str, float]:
+    """Record settable init() values of floating species.
+
+    Species defined by assignment rules are listed as floating but reject init()
+    writes, so each value is written back once here and rule-defined ones dropped.
+    """
+    snapshot: Dict[str, float] = {}
+    for sid in rr.model.getFloatingSpeciesIds():
+        value = float(cast(float, rr.getValue(f'init({sid})')))
+        try:
+            rr.setValue(f'init({sid})', value)
+        except RuntimeError:
+            continue
+        snapshot[sid] = value
+    return snapshot
+
+
+def apply_initial_values(rr: roadrunner.RoadRunner, initial_values: Dict[str, float]) -> None:
+    """Set initial amounts by BNGL species name, falling back to the raw SBML ID."""
+    for name, value in initial_values.items():
+        sid = SPECIES_ID_BY_NAME.get(name, name)
+        try:
+            rr.setValue(f'init({sid})', value)
+        except RuntimeError as exc:
+            raise ValueError(f'Cannot set initial value for species "{name}": {exc}') from exc
+
+
 def simulate_model(
     rr: roadrunner.RoadRunner,
     config: SimulationConfig,
     param_overrides: Dict[str, float] | None = None,
+    condition: ExperimentalCondition | None = None,
 ) -> Any:
     rr.resetAll()
+    # resetAll() keeps earlier init() edits, so restore the model's own seed state
+    # to stop one condition's initial values leaking into the next simulation.
+    for sid, value in INITIAL_VALUES.items():
+        rr.setValue(f'init({sid})', value)
     if TIMECOURSE_SELECTIONS:
         rr.timeCourseSelections = TIMECOURSE_SELECTIONS
         rr.selections = TIMECOURSE_SELECTIONS
+    # Condition parameters go first so seed-state parameters (E_0, S_0) feed normalisation.
+    if condition is not None and condition.parameters:
+        rr.setValues(condition.parameters)
     normalise_initial_conditions(rr)
+    if condition is not None:
+        apply_initial_values(rr, condition.initial_values)
     if param_overrides:
         rr.setValues(param_overrides)
     if TIMECOURSE_SELECTIONS:
@@ -190,23 +273,26 @@ def simulate_model(
     return rr.simulate(config.start, config.end, config.points)
 
 
-def build_jacobian(
+def simulate_observables(
     rr: roadrunner.RoadRunner,
-    config: SimulationConfig,
-    param_names: Sequence[str],
-    base_params: Dict[str, float],
+    condition: ExperimentalCondition,
     observables: Sequence[str],
-    rel_eps: float,
+    param_overrides: Dict[str, float],
 ) -> np.ndarray:
-    baseline = simulate_model(rr, config)
-    obs_indices = {name: baseline.colnames.index(name) for name in observables}
+    """Simulate one stencil point and return the (time x observable) trajectories."""
+    data = simulate_model(rr, condition.config, param_overrides, condition)
+    indices = [data.colnames.index(name) for name in observables]
+    return np.asarray(data, dtype=float)[:, indices]
 
-    time_count = baseline.shape[0]
-    num_obs = len(observables)
-    p = len(param_names)
-    J = np.zeros((time_count * num_obs, p))
 
-    for j, pname in enumerate(param_names):
+def perturbation_stencil(
+    param_names: Sequence[str],
+    base_params: Dict[str, float],
+    rel_eps: float,
+) -> List[Tuple[Dict[str, float], Dict[str, float], float]]:
+    """Central-difference (plus, minus, denominator) triples, one per parameter."""
+    stencil: List[Tuple[Dict[str, float], Dict[str, float], float]] = []
+    for pname in param_names:
         base_val = base_params[pname]
         # Mirror Node script: relative perturbation with lower bound 1e-8.
         eps = max(1e-8, abs(base_val) * rel_eps, 1e-8)
@@ -217,23 +303,96 @@ def build_jacobian(
         minus_params = dict(base_params)
         minus_params[pname] = max(0.0, base_val - eps)
 
-        plus_data = simulate_model(rr, config, plus_params)
-        minus_data = simulate_model(rr, config, minus_params)
-
         denom = plus_params[pname] - minus_params[pname] or eps
+        stencil.append((plus_params, minus_params, denom))
+    return stencil
 
-        for ti in range(time_count):
-            row_offset = ti * num_obs
-            for oi, obs_name in enumerate(observables):
-                idx = obs_indices[obs_name]
-                deriv = (plus_data[ti, idx] - minus_data[ti, idx]) / denom
-                J[row_offset + oi, j] = deriv if np.isfinite(deriv) else 0.0
 
+def build_jacobian(
+    plus_runs: Sequence[np.ndarray],
+    minus_runs: Sequence[np.ndarray],
+    denoms: Sequence[float],
+    obs_weights: np.ndarray,
+) -> np.ndarray:
+    """Assemble a noise-weighted sensitivity matrix with rows ordered (time, observable)."""
+    time_count, num_obs = plus_runs[0].shape
+    J = np.zeros((time_count * num_obs, len(denoms)))
+    scale = np.sqrt(obs_weights)
+    for j, (plus_obs, minus_obs, denom) in enumerate(zip(plus_runs, minus_runs, denoms)):
+        deriv = (plus_obs - minus_obs) / denom
+        deriv = np.where(np.isfinite(deriv), deriv, 0.0) * scale
+        J[:, j] = deriv.reshape(-1)
     return J
 
 
-def compute_fim(J: np.ndarray) -> FIMDecomposition:
-    F = J.T @ J
+def _init_stencil_worker(sbml_path: Path, config: SimulationConfig) -> None:
+    rr, observables = load_model(sbml_path, config)
+    STENCIL_WORKER_STATE['rr'] = rr
+    STENCIL_WORKER_STATE['observables'] = observables
+
+
+def _run_stencil_task(condition: ExperimentalCondition, param_overrides: Dict[str, float]) -> np.ndarray:
+    return simulate_observables(
+        STENCIL_WORKER_STATE['rr'], condition, STENCIL_WORKER_STATE['observables'], param_overrides
+    )
+
+
+def build_condition_fims(
+    sbml_path: Path,
+    rr: roadrunner.RoadRunner,
+    config: SimulationConfig,
+    conditions: Sequence[ExperimentalCondition],
+    param_names: Sequence[str],
+    base_params: Dict[str, float],
+    observables: Sequence[str],
+    rel_eps: float,
+    workers: int = 1,
+) -> Dict[str, np.ndarray]:
+    """Compute one weighted FIM per condition.
+
+    Every condition's perturbation stencil is flattened into a single task list
+    so that, with workers > 1, all conditions are simulated concurrently on a
+    process pool whose workers each load the model once.
+    """
+    stencils = []
+    tasks: List[Tuple[ExperimentalCondition, Dict[str, float]]] = []
+    for condition in conditions:
+        condition_base = dict(base_params)
+        condition_base.update({k: v for k, v in condition.parameters.items() if k in condition_base})
+        stencil = perturbation_stencil(param_names, condition_base, rel_eps)
+        stencils.append(stencil)
+        for plus_params, minus_params, _ in stencil:
+            tasks.append((condition, plus_params))
+            tasks.append((condition, minus_params))
+
+    if workers > 1:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_stencil_worker,
+            initargs=(sbml_path, config),
+        ) as pool:
+            runs = list(pool.map(_run_stencil_task, *zip(*tasks)))
+    else:
+        runs = [simulate_observables(rr, condition, observables, overrides) for condition, overrides in tasks]
+
+    fims: Dict[str, np.ndarray] = {}
+    offset = 0
+    for condition, stencil in zip(conditions, stencils):
+        count = 2 * len(stencil)
+        condition_runs = runs[offset:offset + count]
+        offset += count
+        obs_weights = np.array([condition.weights.get(name, 1.0) for name in observables])
+        J = build_jacobian(
+            condition_runs[0::2],
+            condition_runs[1::2],
+            [denom for _, _, denom in stencil],
+            obs_weights,
+        )
+        fims[condition.name] = J.T @ J
+    return fims
+
+
+def compute_fim(F: np.ndarray) -> FIMDecomposition:
     eigenvalues, eigenvectors = np.linalg.eigh(F)
     order = np.argsort(eigenvalues)[::-1]
     eigenvalues = eigenvalues[order]
@@ -246,7 +405,7 @@ def compute_fim(J: np.ndarray) -> FIMDecomposition:
     regularized_condition = max_eig / max(min_eig, rel_eps)
 
     eig_threshold = max(1e-12, max_eig * 1e-12)
-    p = J.shape[1]
+    p = F.shape[0]
     cov = np.zeros((p, p))
     for k in range(p):
         lam = eigenvalues[k]
@@ -321,6 +480,134 @@ def top_correlated_pairs(correlations: np.ndarray, param_names: Sequence[str], l
     return pairs[:limit]
 
 
+def _condition_mapping(entry: Dict[str, Any], key: str, name: str) -> Dict[str, float]:
+    """Read an optional {id: number} object from a condition entry."""
+    raw = entry.get(key, {})
+    if not isinstance(raw, dict):
+        raise ValueError(f'Condition "{name}" field "{key}" must be a JSON object, got {raw!r}')
+    mapping: Dict[str, float] = {}
+    for item_id, value in raw.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f'Condition "{name}" field "{key}" has a non-numeric value for "{item_id}": {value!r}')
+        mapping[item_id] = float(value)
+    return mapping
+
+
+def load_conditions(conditions_path: Path, base_config: SimulationConfig) -> List[ExperimentalCondition]:
+    """Parse a JSON conditions file; time grids default to the CLI configuration."""
+    raw = json.loads(conditions_path.read_text(encoding='utf-8'))
+    entries = raw.get('conditions', []) if isinstance(raw, dict) else raw
+    if not entries:
+        raise ValueError(f'No conditions defined in {conditions_path}')
+
+    conditions: List[ExperimentalCondition] = []
+    for index, entry in enumerate(entries):
+        if not isinstance(entry, dict):
+            raise ValueError(f'Condition #{index + 1} in {conditions_path} must be a JSON object, got {entry!r}')
+        name = str(entry.get('name', f'condition_{index + 1}'))
+        if any(existing.name == name for existing in conditions):
+            raise ValueError(f'Duplicate condition name: {name}')
+        weights = _condition_mapping(entry, 'weights', name)
+        negative = [obs for obs, w in weights.items() if w < 0]
+        if negative:
+            raise ValueError(f'Condition "{name}" has negative noise weights for: {", ".join(negative)}')
+        config = dataclasses.replace(
+            base_config,
+            start=float(entry.get('t_start', base_config.start)),
+            end=float(entry.get('t_end', base_config.end)),
+            steps=int(entry.get('steps', base_config.steps)),
+        )
+        if config.steps <= 0:
+            raise ValueError(f'Condition "{name}" must have a positive number of steps, got {config.steps}')
+        if config.end <= config.start:
+            raise ValueError(f'Condition "{name}" must have t_end > t_start, got {config.start} to {config.end}')
+        conditions.append(
+            ExperimentalCondition(
+                name=name,
+                config=config,
+                initial_values=_condition_mapping(entry, 'initial', name),
+                parameters=_condition_mapping(entry, 'parameters', name),
+                weights=weights,
+            )
+        )
+    return conditions
+
+
+def load_model(sbml_path: Path, config: SimulationConfig) -> Tuple[roadrunner.RoadRunner, List[str]]:
+    """Load an SBML model, configure its integrator and return it with its observables."""
+    rr = roadrunner.RoadRunner(str(sbml_path))
+    global SPECIES_ID_BY_NAME
+    SPECIES_ID_BY_NAME = load_species_name_map(sbml_path)
+    configure_integrator(rr, config)
+    global INITIAL_VALUES
+    INITIAL_VALUES = snapshot_initial_values(rr)
+    observables = infer_observables(rr)
+    global TIMECOURSE_SELECTIONS
+    TIMECOURSE_SELECTIONS = ['time', *observables]
+    rr.timeCourseSelections = TIMECOURSE_SELECTIONS
+    return rr, observables
+
+
+def infer_parameters(rr: roadrunner.RoadRunner) -> List[str]:
+    """Infer kinetic parameter IDs (prefixed with k_) to differentiate."""
+    kinetic_candidates = [pid for pid in rr.model.getGlobalParameterIds() if not pid.startswith('obs_')]
+    param_names = [pid for pid in kinetic_candidates if pid.startswith('k_')]
+    if not param_names:
+        raise RuntimeError('Could not infer kinetic parameters. Specify them via --parameters.')
+    return param_names
+
+
+def run_fim(
+    sbml_path: Path,
+    config: SimulationConfig,
+    parameters: Sequence[str] | None = None,
+    rel_eps: float = 1e-4,
+    conditions: Sequence[ExperimentalCondition] | None = None,
+    workers: int = 1,
+) -> FIMResult:
+    """Run the full FIM workflow for a single SBML model.
+
+    With several conditions, the weighted per-condition FIMs are summed before
+    the decomposition, i.e. the experiments are treated as independent.
+    """
+    rr, observables = load_model(sbml_path, config)
+    param_names = list(parameters) if parameters else infer_parameters(rr)
+    base_params = snapshot_parameters(rr, param_names)
+
+    if not conditions:
+        conditions = [ExperimentalCondition('default', config)]
+    # Check overrides up front so bad ids fail here with the condition's name,
+    # not as a raw RoadRunner error from inside a stencil worker.
+    global_params = set(rr.model.getGlobalParameterIds())
+    boundary_species = set(rr.model.getBoundarySpeciesIds())
+    species_ids = set(rr.model.getFloatingSpeciesIds()) | boundary_species
+    settable_species = set(INITIAL_VALUES) | boundary_species
+    for condition in conditions:
+        unknown = sorted(set(condition.weights) - set(observables))
+        if unknown:
+            raise ValueError(f'Condition "{condition.name}" weights unknown observables: {", ".join(unknown)}')
+        unknown = sorted(set(condition.parameters) - global_params)
+        if unknown:
+            raise ValueError(f'Condition "{condition.name}" overrides unknown parameters: {", ".join(unknown)}')
+        resolved = {name: SPECIES_ID_BY_NAME.get(name, name) for name in condition.initial_values}
+        unknown = sorted(name for name, sid in resolved.items() if sid not in species_ids)
+        if unknown:
+            raise ValueError(f'Condition "{condition.name}" sets initial values of unknown species: {", ".join(unknown)}')
+        ruled = sorted(name for name, sid in resolved.items() if sid not in settable_species)
+        if ruled:
+            raise ValueError(
+                f'Condition "{condition.name}" sets initial values of rule-defined species: {", ".join(ruled)}'
+            )
+
+    condition_fims = build_condition_fims(
+        sbml_path, rr, config, conditions, param_names, base_params, observables, rel_eps, workers
+    )
+    fim_stats = compute_fim(sum(condition_fims.values()))
+    ident_stats = analyse_identifiability(fim_stats.eigenvalues, fim_stats.eigenvectors, param_names)
+    corr_pairs = top_correlated_pairs(fim_stats.correlations, param_names)
+    return FIMResult(param_names, observables, fim_stats, ident_stats, corr_pairs, condition_fims)
+
+
 def print_matrix(matrix: np.ndarray, format_str: str = '.3e') -> None:
     for row in matrix:
         print('  ', ' '.join(f'{val:{format_str}}'.rjust(12) for val in row))
@@ -336,6 +623,8 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument('--abs-tol', type=float, default=1e-12, help='CVODE absolute tolerance (default: 1e-12).')
     parser.add_argument('--rel-tol', type=float, default=1e-10, help='CVODE relative tolerance (default: 1e-10).')
     parser.add_argument('--integrator', type=str, default='cvode', help="RoadRunner integrator to use (e.g. 'cvode', 'rk4').")
+    parser.add_argument('--conditions', type=Path, help='JSON file of experimental conditions whose FIMs are summed.')
+    parser.add_argument('--workers', type=int, default=1, help='Processes used to simulate perturbation stencils (default: 1).')
     return parser.parse_args()
 
 
@@ -353,32 +642,23 @@ def main() -> None:
         integrator=args.integrator,
     )
 
+    conditions = load_conditions(args.conditions, config) if args.conditions else None
+
     print('Computing FIM for Michaelis–Menten model using RoadRunner...\n')
     print(f'Loading model from: {sbml_path}\n')
 
-    rr = roadrunner.RoadRunner(str(sbml_path))
-    global SPECIES_ID_BY_NAME
-    SPECIES_ID_BY_NAME = load_species_name_map(sbml_path)
-    configure_integrator(rr, config)
-    observables = infer_observables(rr)
-    global TIMECOURSE_SELECTIONS
-    TIMECOURSE_SELECTIONS = ['time', *observables]
-    rr.timeCourseSelections = TIMECOURSE_SELECTIONS
-
-    if args.parameters:
-        param_names = args.parameters
-    else:
-        kinetic_candidates = [pid for pid in rr.model.getGlobalParameterIds() if not pid.startswith('obs_')]
-        param_names = [pid for pid in kinetic_candidates if pid.startswith('k_')]
-        if not param_names:
-            raise RuntimeError('Could not infer kinetic parameters. Specify them via --parameters.')
-
-    base_params = snapshot_parameters(rr, param_names)
-
-    J = build_jacobian(rr, config, param_names, base_params, observables, args.rel_eps)
-    fim_stats = compute_fim(J)
-    ident_stats = analyse_identifiability(fim_stats.eigenvalues, fim_stats.eigenvectors, param_names)
-    corr_pairs = top_correlated_pairs(fim_stats.correlations, param_names)
+    result = run_fim(sbml_path, config, args.parameters, args.rel_eps, conditions, args.workers)
+    fim_stats = result.fim
+    ident_stats = result.identifiability
+    corr_pairs = result.correlated_pairs
+
+    if len(result.condition_fims) > 1:
+        total_trace = float(np.trace(fim_stats.fim_matrix))
+        print('Per-condition information share (trace of weighted FIM):')
+        for name, condition_fim in result.condition_fims.items():
+            share = float(np.trace(condition_fim)) / total_trace if total_trace > 0 else 0.0
+            print(f'  {name}: {share:.2%}')
+        print()
 
     print('FIM eigenvalues (descending):')
     for idx, val in enumerate(fim_stats.eigenvalues):
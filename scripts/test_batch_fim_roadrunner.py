@@ -0,0 +1,155 @@
+"""Checks for the scheduling and crash-recovery logic in batch_fim_roadrunner.py.
+
+Run with ``python -m pytest scripts``.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import pytest
+
+pytest.importorskip('numpy')
+pytest.importorskip('roadrunner')
+
+import batch_fim_roadrunner as batch  # noqa: E402
+from check_mm_fim_roadrunner import SimulationConfig  # noqa: E402
+
+
+def write_sbml(path: Path, species: int, reactions: int) -> Path:
+    species_xml = ''.join(f'<species id="S{i}"/>' for i in range(species))
+    reactions_xml = ''.join(f'<reaction id="R{i}"/>' for i in range(reactions))
+    path.write_text(
+        '<sbml xmlns="http://www.sbml.org/sbml/level3/version1/core"><model>'
+        f'<listOfSpecies>{species_xml}</listOfSpecies>'
+        f'<listOfReactions>{reactions_xml}</listOfReactions>'
+        '</model></sbml>',
+        encoding='utf-8',
+    )
+    return path
+
+
+def test_discover_models_from_directory_filters_sbml_suffixes(tmp_path: Path) -> None:
+    write_sbml(tmp_path / 'b.xml', 1, 1)
+    write_sbml(tmp_path / 'a.sbml', 1, 1)
+    (tmp_path / 'notes.txt').write_text('ignored', encoding='utf-8')
+
+    assert batch.discover_models(tmp_path) == [(tmp_path / 'a.sbml').resolve(), (tmp_path / 'b.xml').resolve()]
+
+
+def test_discover_models_from_manifest_resolves_relative_paths(tmp_path: Path) -> None:
+    manifest_dir = tmp_path / 'manifests'
+    manifest_dir.mkdir()
+    manifest = manifest_dir / 'models.txt'
+    manifest.write_text(
+        '# nightly models\n'
+        '\n'
+        '../exports/first.xml  # trailing comment\n'
+        f'{tmp_path / "abs.xml"}\n'
+        'exports/../../exports/first.xml\n',
+        encoding='utf-8',
+    )
+
+    assert batch.discover_models(manifest) == [
+        (tmp_path / 'exports' / 'first.xml').resolve(),
+        (tmp_path / 'abs.xml').resolve(),
+    ]
+
+
+def test_plan_jobs_mixes_past_timings_with_scaled_size_heuristic(tmp_path: Path) -> None:
+    config = SimulationConfig(steps=99)  # 100 points
+    timed_small = write_sbml(tmp_path / 'timed_small.xml', 1, 1).resolve()  # 2 * 100 units, 4 s
+    timed_large = write_sbml(tmp_path / 'timed_large.xml', 4, 4).resolve()  # 8 * 100 units, 8 s
+    untimed_big = write_sbml(tmp_path / 'untimed_big.xml', 10, 10).resolve()  # 20 * 100 units
+    untimed_tiny = write_sbml(tmp_path / 'untimed_tiny.xml', 0, 1).resolve()  # 1 * 100 units
+    timings = {str(timed_small): 4.0, str(timed_large): 8.0}
+
+    jobs = batch.plan_jobs([timed_small, untimed_tiny, timed_large, untimed_big], timings, config)
+
+    # Median seconds-per-unit of the timed models is (0.02 + 0.01) / 2 = 0.015.
+    assert [job.path for job in jobs] == [untimed_big, timed_large, timed_small, untimed_tiny]
+    assert [job.predicted_cost for job in jobs] == pytest.approx([30.0, 8.0, 4.0, 1.5])
+    assert (jobs[0].species, jobs[0].reactions) == (10, 10)
+
+
+def test_plan_jobs_without_history_orders_by_size(tmp_path: Path) -> None:
+    small = write_sbml(tmp_path / 'small.xml', 1, 0).resolve()
+    large = write_sbml(tmp_path / 'large.xml', 3, 3).resolve()
+
+    jobs = batch.plan_jobs([small, large], {}, SimulationConfig())
+
+    assert [job.path for job in jobs] == [large, small]
+
+
+def test_load_past_timings_rescales_to_current_run(tmp_path: Path) -> None:
+    report = tmp_path / 'report.jsonl'
+    report.write_text(
+        '{"model": "/m/a.xml", "status": "ok", "elapsed_seconds": 10.0, "points": 101, "parameter_count": 2}\n'
+        '{"model": "/m/b.xml", "status": "error", "elapsed_seconds": 1.0, "points": 101, "parameter_count": 2}\n'
+        '{"model": "/m/c.xml", "status": "ok", "elapsed_seconds": 3.0}\n'
+        'not json\n',
+        encoding='utf-8',
+    )
+
+    # Twice the points, parameter list left to per-model inference.
+    assert batch.load_past_timings(report, SimulationConfig(steps=201)) == {'/m/a.xml': pytest.approx(20.0)}
+    # Twice the points and three parameters instead of two.
+    assert batch.load_past_timings(report, SimulationConfig(steps=201), 3) == {'/m/a.xml': pytest.approx(30.0)}
+    assert batch.load_past_timings(tmp_path / 'missing.jsonl', SimulationConfig()) == {}
+
+
+def fake_run_fim(sbml_path: Path, *args: Any, **kwargs: Any) -> str:
+    if sbml_path.name == 'crash.xml':
+        os._exit(1)  # stands in for a segfault inside libroadrunner
+    return sbml_path.name
+
+
+@pytest.mark.skipif(
+    multiprocessing.get_start_method() != 'fork',
+    reason='monkeypatched worker functions are only inherited by forked workers',
+)
+def test_run_batch_blames_only_the_crashing_model(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(batch, 'run_fim', fake_run_fim)
+    monkeypatch.setattr(batch, 'summarise_result', lambda result: {'result': result})
+    names = ['crash.xml', *(f'ok_{i}.xml' for i in range(5))]
+    jobs = [batch.ModelJob(tmp_path / name, 0, 0, float(len(names) - i)) for i, name in enumerate(names)]
+
+    outcomes: List[Tuple[str, Dict[str, Any]]] = []
+    batch.run_batch(jobs, 3, SimulationConfig(), None, 1e-4, lambda job, out: outcomes.append((job.path.name, out)))
+
+    by_name = dict(outcomes)
+    assert len(outcomes) == len(names)
+    assert by_name['crash.xml']['status'] == 'error'
+    assert all(by_name[name]['status'] == 'ok' for name in names[1:])
+
+
+def exit_before_start(*args: Any, **kwargs: Any) -> None:
+    os._exit(1)  # stands in for a worker dying during bootstrap, before run_job runs
+
+
+@pytest.mark.skipif(
+    multiprocessing.get_start_method() != 'fork',
+    reason='monkeypatched worker functions are only inherited by forked workers',
+)
+def test_run_batch_gives_up_when_pool_breaks_before_any_model_starts(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(batch, 'run_job', exit_before_start)
+    jobs = [batch.ModelJob(tmp_path / f'model_{i}.xml', 0, 0, float(3 - i)) for i in range(3)]
+
+    outcomes: List[Tuple[str, Dict[str, Any]]] = []
+    runner = threading.Thread(
+        target=batch.run_batch,
+        args=(jobs, 2, SimulationConfig(), None, 1e-4, lambda job, out: outcomes.append((job.path.name, out))),
+        daemon=True,
+    )
+    runner.start()
+    runner.join(timeout=60)
+
+    assert not runner.is_alive(), 'run_batch kept resubmitting jobs that never start'
+    assert sorted(name for name, _ in outcomes) == [job.path.name for job in jobs]
+    assert all('before this model started' in out['error'] for _, out in outcomes)
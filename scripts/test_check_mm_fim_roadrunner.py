@@ -0,0 +1,250 @@
+"""Checks for the multi-condition FIM helpers in check_mm_fim_roadrunner.py.
+
+Run with ``python -m pytest scripts``.
+"""
+
+from __future__ import annotations
+
+import re
+from pathlib import Path
+from typing import Any, Dict
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('roadrunner')
+
+import check_mm_fim_roadrunner as fim  # noqa: E402
+
+
+CONVERSION_SBML = '''<?xml version="1.0" encoding="UTF-8"?>
+<sbml xmlns="http://www.sbml.org/sbml/level3/version1/core" level="3" version="1">
+  <model id="conversion">
+    <listOfCompartments>
+      <compartment id="c" size="1" constant="true" spatialDimensions="3"/>
+    </listOfCompartments>
+    <listOfSpecies>
+      <species id="S1" name="X()" compartment="c" initialAmount="1" hasOnlySubstanceUnits="true"
+               boundaryCondition="false" constant="false"/>
+      <species id="S2" name="Y()" compartment="c" initialAmount="0" hasOnlySubstanceUnits="true"
+               boundaryCondition="false" constant="false"/>
+    </listOfSpecies>
+    <listOfParameters>
+      <parameter id="k_1" value="0.5" constant="true"/>
+      <parameter id="k_2" value="0.1" constant="true"/>
+      <parameter id="obs_Y" value="0" constant="false"/>
+    </listOfParameters>
+    <listOfRules>
+      <assignmentRule variable="obs_Y">
+        <math xmlns="http://www.w3.org/1998/Math/MathML"><ci>S2</ci></math>
+      </assignmentRule>
+    </listOfRules>
+    <listOfReactions>
+      <reaction id="R1" reversible="false">
+        <listOfReactants><speciesReference species="S1" stoichiometry="1" constant="true"/></listOfReactants>
+        <listOfProducts><speciesReference species="S2" stoichiometry="1" constant="true"/></listOfProducts>
+        <kineticLaw>
+          <math xmlns="http://www.w3.org/1998/Math/MathML">
+            <apply><times/><ci>k_1</ci><ci>S1</ci></apply>
+          </math>
+        </kineticLaw>
+      </reaction>
+      <reaction id="R2" reversible="false">
+        <listOfReactants><speciesReference species="S2" stoichiometry="1" constant="true"/></listOfReactants>
+        <kineticLaw>
+          <math xmlns="http://www.w3.org/1998/Math/MathML">
+            <apply><times/><ci>k_2</ci><ci>S2</ci></apply>
+          </math>
+        </kineticLaw>
+      </reaction>
+    </listOfReactions>
+  </model>
+</sbml>
+'''
+
+
+RULE_SPECIES_SBML = '''<?xml version="1.0" encoding="UTF-8"?>
+<sbml xmlns="http://www.sbml.org/sbml/level3/version1/core" level="3" version="1">
+  <model id="rule_species">
+    <listOfCompartments>
+      <compartment id="c" size="1" constant="true" spatialDimensions="3"/>
+    </listOfCompartments>
+    <listOfSpecies>
+      <species id="S1" name="X()" compartment="c" initialAmount="1" hasOnlySubstanceUnits="true"
+               boundaryCondition="false" constant="false"/>
+      <species id="S2" name="Y()" compartment="c" initialAmount="0" hasOnlySubstanceUnits="true"
+               boundaryCondition="false" constant="false"/>
+    </listOfSpecies>
+    <listOfParameters>
+      <parameter id="k_1" value="0.5" constant="true"/>
+      <parameter id="obs_S" value="0" constant="false"/>
+    </listOfParameters>
+    <listOfRules>
+      <assignmentRule variable="S2">
+        <math xmlns="http://www.w3.org/1998/Math/MathML"><apply><times/><cn>2</cn><ci>S1</ci></apply></math>
+      </assignmentRule>
+      <assignmentRule variable="obs_S">
+        <math xmlns="http://www.w3.org/1998/Math/MathML"><apply><plus/><ci>S1</ci><ci>S2</ci></apply></math>
+      </assignmentRule>
+    </listOfRules>
+    <listOfReactions>
+      <reaction id="R1" reversible="false">
+        <listOfReactants><speciesReference species="S1" stoichiometry="1" constant="true"/></listOfReactants>
+        <kineticLaw>
+          <math xmlns="http://www.w3.org/1998/Math/MathML">
+            <apply><times/><ci>k_1</ci><ci>S1</ci></apply>
+          </math>
+        </kineticLaw>
+      </reaction>
+    </listOfReactions>
+  </model>
+</sbml>
+'''
+
+
+@pytest.fixture
+def conversion_model(tmp_path: Path) -> Path:
+    path = tmp_path / 'conversion.xml'
+    path.write_text(CONVERSION_SBML, encoding='utf-8')
+    return path
+
+
+def test_condition_initial_values_do_not_leak_into_later_conditions(conversion_model: Path) -> None:
+    config = fim.SimulationConfig(end=10.0, steps=50)
+    dosed = fim.ExperimentalCondition('A', config, initial_values={'X()': 10.0})
+    plain = fim.ExperimentalCondition('B', config)
+
+    alone = fim.run_fim(conversion_model, config, conditions=[plain])
+    after_dose = fim.run_fim(conversion_model, config, conditions=[dosed, plain])
+
+    np.testing.assert_allclose(after_dose.condition_fims['B'], alone.condition_fims['B'], rtol=1e-8)
+    assert not np.allclose(after_dose.condition_fims['A'], after_dose.condition_fims['B'])
+
+
+def test_assignment_rule_species_are_not_restored(tmp_path: Path) -> None:
+    model = tmp_path / 'rule_species.xml'
+    model.write_text(RULE_SPECIES_SBML, encoding='utf-8')
+    config = fim.SimulationConfig(end=10.0, steps=50)
+    dosed = fim.ExperimentalCondition('A', config, initial_values={'X()': 10.0})
+    plain = fim.ExperimentalCondition('B', config)
+
+    default = fim.run_fim(model, config)
+    alone = fim.run_fim(model, config, conditions=[plain])
+    after_dose = fim.run_fim(model, config, conditions=[dosed, plain])
+
+    assert 'S2' not in fim.INITIAL_VALUES and 'S1' in fim.INITIAL_VALUES
+    assert default.fim.eigenvalues[0] > 0
+    np.testing.assert_allclose(after_dose.condition_fims['B'], alone.condition_fims['B'], rtol=1e-8)
+
+
+def test_pooled_stencils_match_serial_run(conversion_model: Path) -> None:
+    config = fim.SimulationConfig(end=10.0, steps=50)
+    conditions = [
+        fim.ExperimentalCondition('A', config, initial_values={'X()': 10.0}),
+        fim.ExperimentalCondition('B', config),
+    ]
+
+    serial = fim.run_fim(conversion_model, config, conditions=conditions)
+    pooled = fim.run_fim(conversion_model, config, conditions=conditions, workers=2)
+
+    for name in ('A', 'B'):
+        np.testing.assert_allclose(pooled.condition_fims[name], serial.condition_fims[name], rtol=1e-8)
+
+
+def write_conditions(tmp_path: Path, text: str) -> Path:
+    path = tmp_path / 'conditions.json'
+    path.write_text(text, encoding='utf-8')
+    return path
+
+
+def test_load_conditions_applies_defaults(tmp_path: Path) -> None:
+    base = fim.SimulationConfig(end=50.0, steps=500)
+    path = write_conditions(
+        tmp_path,
+        '{"conditions": [{"initial": {"X()": 2}, "t_end": 100, "weights": {"obs_Y": 4}}, {"name": "ref"}]}',
+    )
+
+    first, second = fim.load_conditions(path, base)
+
+    assert first.name == 'condition_1'
+    assert (first.config.start, first.config.end, first.config.steps) == (0.0, 100.0, 500)
+    assert first.initial_values == {'X()': 2.0}
+    assert first.weights == {'obs_Y': 4.0}
+    assert second.name == 'ref'
+    assert second.config == base
+    assert second.parameters == {} and second.weights == {}
+
+
+def test_load_conditions_accepts_bare_list(tmp_path: Path) -> None:
+    path = write_conditions(tmp_path, '[{"name": "a"}, {"name": "b"}]')
+    assert [c.name for c in fim.load_conditions(path, fim.SimulationConfig())] == ['a', 'b']
+
+
+@pytest.mark.parametrize(
+    'text, message',
+    [
+        ('{"conditions": []}', 'No conditions'),
+        ('[{"name": "a"}, {"name": "a"}]', 'Duplicate condition name'),
+        ('["low_dose"]', 'must be a JSON object'),
+        ('[{"steps": 0}]', 'positive number of steps'),
+        ('[{"t_start": 10, "t_end": 5}]', 't_end > t_start'),
+        ('[{"weights": {"obs_Y": -1}}]', 'negative noise weights'),
+        ('[{"initial": [1, 2]}]', 'field "initial" must be a JSON object'),
+        ('[{"parameters": "k_1=2"}]', 'field "parameters" must be a JSON object'),
+        ('[{"weights": null}]', 'field "weights" must be a JSON object'),
+        ('[{"parameters": {"k_1": "fast"}}]', 'non-numeric value for "k_1"'),
+    ],
+)
+def test_load_conditions_rejects_invalid_entries(tmp_path: Path, text: str, message: str) -> None:
+    with pytest.raises(ValueError, match=message):
+        fim.load_conditions(write_conditions(tmp_path, text), fim.SimulationConfig())
+
+
+@pytest.mark.parametrize(
+    'condition_kwargs, message',
+    [
+        ({'weights': {'obs_Z': 1.0}}, 'weights unknown observables: obs_Z'),
+        ({'parameters': {'k_missing': 1.0}}, 'overrides unknown parameters: k_missing'),
+        ({'initial_values': {'W()': 1.0}}, 'sets initial values of unknown species: W()'),
+    ],
+)
+def test_run_fim_rejects_unknown_condition_ids(
+    conversion_model: Path, condition_kwargs: Dict[str, Any], message: str
+) -> None:
+    config = fim.SimulationConfig(end=10.0, steps=50)
+    condition = fim.ExperimentalCondition('bad', config, **condition_kwargs)
+
+    with pytest.raises(ValueError, match=f'Condition "bad" {re.escape(message)}'):
+        fim.run_fim(conversion_model, config, conditions=[condition], workers=2)
+
+
+def test_run_fim_rejects_initial_values_for_rule_defined_species(tmp_path: Path) -> None:
+    model = tmp_path / 'rule_species.xml'
+    model.write_text(RULE_SPECIES_SBML, encoding='utf-8')
+    config = fim.SimulationConfig(end=10.0, steps=50)
+    condition = fim.ExperimentalCondition('bad', config, initial_values={'Y()': 1.0, 'S1': 2.0})
+
+    with pytest.raises(ValueError, match=r'rule-defined species: Y\(\)$'):
+        fim.run_fim(model, config, conditions=[condition])
+
+
+def test_build_jacobian_scales_rows_by_sqrt_weight() -> None:
+    # Two time points x two observables, two parameters.
+    plus_runs = [np.array([[2.0, 4.0], [6.0, 8.0]]), np.array([[1.0, 1.0], [1.0, np.inf]])]
+    minus_runs = [np.zeros((2, 2)), np.zeros((2, 2))]
+    weights = np.array([4.0, 9.0])
+
+    J = fim.build_jacobian(plus_runs, minus_runs, [2.0, 1.0], weights)
+
+    # Rows are ordered (time, observable); non-finite derivatives become zero.
+    expected = np.array([
+        [1.0 * 2.0, 1.0 * 2.0],
+        [2.0 * 3.0, 1.0 * 3.0],
+        [3.0 * 2.0, 1.0 * 2.0],
+        [4.0 * 3.0, 0.0],
+    ])
+    np.testing.assert_allclose(J, expected)
+    # Weighted FIM equals sum over rows of w * (dy/dp)(dy/dp)^T.
+    unweighted = fim.build_jacobian(plus_runs, minus_runs, [2.0, 1.0], np.ones(2))
+    row_weights = np.tile(weights, 2)
+    np.testing.assert_allclose(J.T @ J, unweighted.T @ (row_weights[:, None] * unweighted))